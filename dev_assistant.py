@@ -1,9 +1,29 @@
 # dev_assistant.py
 from mcp.server.fastmcp import FastMCP
+from contextlib import asynccontextmanager
+import bz2
+import csv
+import glob
+import gzip
+import importlib
+import io
+import itertools
+import lzma
+import operator
 import os
+import queue
+import threading
 import time
+import uuid
 
-mcp = FastMCP("R Python Development Assistant")
+@asynccontextmanager
+async def _lifespan(server):
+    # Runs however the server is launched (python dev_assistant.py, mcp run, mcp dev)
+    _start_warmup()
+    yield
+
+
+mcp = FastMCP("R Python Development Assistant", lifespan=_lifespan)
 
 # =============================================================================
 # PYTHON EXECUTION TOOLS
@@ -32,12 +52,382 @@ def run_python_code(code: str) -> str:
     except Exception as e:
         return f"Python Error:\n{str(e)}"
 
+# =============================================================================
+# COMPRESSED INPUT HELPERS
+# =============================================================================
+
+_MAGIC_BYTES = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+]
+
+
+def _detect_compression(file_path: str) -> str | None:
+    """Sniff the compression format from the file's magic bytes (extension is ignored)"""
+    with open(file_path, 'rb') as f:
+        head = f.read(6)
+    for magic, name in _MAGIC_BYTES:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _open_zstd(file_path: str):
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.open(file_path, 'rb')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstandard not installed - needed for .zst files. Try: pip install zstandard")
+    reader = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+    return io.BufferedReader(reader)
+
+
+class _PrefetchReader(io.RawIOBase):
+    """Runs decompression on a background thread so the parser never waits on it.
+
+    zlib, bz2, lzma and zstd all release the GIL while decompressing, so the
+    producer thread genuinely overlaps with CSV parsing in the caller.
+    """
+    
+    def __init__(self, source, chunk_size: int = 1 << 20, depth: int = 8):
+        self._source = source
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=depth)
+        self._chunk = memoryview(b"")
+        self._eof = False
+        self._error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+    
+    def _pump(self):
+        try:
+            while not self._stop.is_set():
+                chunk = self._source.read(self._chunk_size)
+                self._put(chunk)
+                if not chunk:
+                    break
+        except Exception as e:
+            self._put(e)
+    
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        if self._error is not None:
+            raise self._error  # the producer has exited; never block on the queue again
+        if not self._chunk and not self._eof:
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._error = item
+                raise item
+            self._eof = not item
+            self._chunk = memoryview(item)
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+    
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+def _open_stream(file_path: str, prefetch: bool = False):
+    """Open a (possibly compressed) file as a binary stream of decompressed bytes
+
+    With prefetch=True decompression runs ahead on a background thread; use it
+    for full reads, not for peeking at a few rows.
+    """
+    compression = _detect_compression(file_path)
+    if compression is None:
+        return open(file_path, 'rb')
+    
+    if compression == "gzip":
+        stream = gzip.open(file_path, 'rb')
+    elif compression == "bz2":
+        stream = bz2.open(file_path, 'rb')
+    elif compression == "xz":
+        stream = lzma.open(file_path, 'rb')
+    else:
+        stream = _open_zstd(file_path)
+    
+    if prefetch:
+        return io.BufferedReader(_PrefetchReader(stream), buffer_size=1 << 20)
+    return stream
+
+
+def _open_text(file_path: str, prefetch: bool = False):
+    """Text-mode counterpart of _open_stream, ready for the csv module"""
+    return io.TextIOWrapper(_open_stream(file_path, prefetch), encoding='utf-8', newline='')
+
+# =============================================================================
+# RESULT PAGING
+# =============================================================================
+
+_PAGE_BYTES = 16 * 1024   # byte budget per tool response
+_CURSOR_TTL = 600         # seconds a cursor stays fetchable
+_MAX_CURSORS = 32
+
+# cursor -> [expires_at, pending lines, source iterator, served page or None]
+# Pending lines are the few already pulled past the page end; the source is the
+# tool's own iterator, never a wrapper, so paging depth doesn't grow per page.
+_cursors = {}
+_cursors_lock = threading.RLock()
+_END = object()
+
+
+def _truncation_footer(cursor: str, max_bytes: int) -> str:
+    return f"📎 Output truncated at {max_bytes:,} bytes - continue with fetch_more(cursor='{cursor}')"
+
+
+def _page_lines(pending: list[str], source, max_bytes: int, consumed: list[str]):
+    """Fill one page from pending lines, then the source; returns (page, leftover or None)
+
+    Lines pulled from the source are also appended to `consumed` so a caller can
+    roll back if the source raises mid-page.
+    """
+    # Room left for the content once a blank line and the footer are appended
+    limit = max_bytes - len(_truncation_footer("0" * 12, max_bytes).encode('utf-8')) - 1
+    page = []
+    used = 0
+    fits = 0              # lines that still fit when the footer is needed
+    i = 0
+    while True:
+        if i < len(pending):
+            line = pending[i]
+            i += 1
+        else:
+            line = next(source, _END)
+            if line is _END:
+                return page, None
+            consumed.append(line)
+        size = len(line.encode('utf-8')) + 1
+        if used + size > max_bytes:
+            break
+        page.append(line)
+        used += size
+        if used <= limit:
+            fits += 1
+    
+    rest = page[fits:] + [line] + pending[i:]
+    page = page[:fits]
+    if not page:
+        # A single oversized line: split it so every page makes progress
+        head = rest[0].encode('utf-8')[:max(limit - 1, 1)].decode('utf-8', 'ignore')
+        page.append(head)
+        rest[0] = rest[0][len(head):]
+    return page, rest
+
+
+def _finish_page(page: list[str], rest, source, max_bytes: int) -> str:
+    """Join a page, parking the leftover behind a new cursor if there is one"""
+    if rest is None:
+        return "\n".join(page)
+    
+    cursor = uuid.uuid4().hex[:12]
+    now = time.monotonic()
+    with _cursors_lock:
+        for key in [key for key, entry in _cursors.items() if entry[0] < now]:
+            del _cursors[key]
+        while len(_cursors) >= _MAX_CURSORS:
+            del _cursors[next(iter(_cursors))]
+        _cursors[cursor] = [now + _CURSOR_TTL, rest, source, None]
+    
+    page.append("")
+    page.append(_truncation_footer(cursor, max_bytes))
+    return "\n".join(page)
+
+
+def _paginate(lines, max_bytes: int = _PAGE_BYTES) -> str:
+    """Join report lines up to a byte budget, parking the rest behind a cursor
+
+    `lines` may be a list or a lazy iterator; the unread part is kept as-is, so
+    fetch_more continues where this page stopped instead of recomputing.
+    """
+    source = iter(lines)
+    page, rest = _page_lines([], source, max_bytes, [])
+    return _finish_page(page, rest, source, max_bytes)
+
+
+@mcp.tool()
+def fetch_more(cursor: str, max_bytes: int = _PAGE_BYTES) -> str:
+    """Fetch the next page of a truncated tool result"""
+    with _cursors_lock:
+        entry = _cursors.get(cursor)
+        if entry is None or entry[0] < time.monotonic():
+            return f"❌ Cursor '{cursor}' is unknown or expired (cursors live {_CURSOR_TTL // 60} minutes) - rerun the tool"
+        
+        # A cursor keeps serving the same page until it expires, so a retried call is safe
+        _, pending, source, page = entry
+        if page is not None:
+            return page
+        
+        max_bytes = max(max_bytes, 256)
+        consumed = []
+        try:
+            lines, rest = _page_lines(pending, source, max_bytes, consumed)
+        except Exception as e:
+            # Keep what was read so the next attempt starts from the same place
+            entry[1] = pending + consumed
+            return f"❌ Error fetching more results: {str(e)}"
+        entry[3] = _finish_page(lines, rest, source, max_bytes)
+        entry[1] = entry[2] = None
+        return entry[3]
+
+# =============================================================================
+# STARTUP WARM-UP & DATAFRAME CACHE
+# =============================================================================
+
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_frame_cache = {}         # (engine, abs path, separator, has_header) -> ((mtime_ns, size), frame)
+_warmup_status = {"state": "not started", "imports": {}, "preload": {}, "total": None}
+_warmup_lock = threading.Lock()
+
+
+def _read_frame(engine: str, file_path: str, separator: str, has_header: bool = True, cache: bool = False):
+    """Parse a CSV with polars or pandas, reusing a warm frame if the file is unchanged"""
+    key = (engine, os.path.abspath(file_path), separator, has_header)
+    stat = os.stat(file_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _frame_cache.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    
+    if engine == "polars":
+        import polars as pl
+        
+        if _detect_compression(file_path):
+            # Polars buffers the whole stream anyway, and an exception raised from a
+            # Python reader inside it surfaces as a pyo3 PanicException (a BaseException)
+            # - so decompress up front and let errors surface as ordinary exceptions
+            with _open_stream(file_path) as stream:
+                data = stream.read()
+            source = lambda: io.BytesIO(data)
+        else:
+            source = lambda: file_path
+        
+        try:
+            frame = pl.read_csv(source(), separator=separator, has_header=has_header)
+        except pl.exceptions.ComputeError:
+            # Schema inference only samples the first 100 rows; SAP-style keys are mostly
+            # numeric with the odd code like 132ES01 further down. Retry inferring from
+            # the whole file rather than guessing a larger sample.
+            frame = pl.read_csv(source(), separator=separator, has_header=has_header,
+                                infer_schema_length=None)
+    else:
+        import pandas as pd
+        
+        read = lambda source: pd.read_csv(source, sep=separator, header=0 if has_header else None)
+        if _detect_compression(file_path):
+            # pandas' C parser pulls chunks as it goes, overlapping background decompression
+            with _open_stream(file_path, prefetch=True) as stream:
+                frame = read(stream)
+        else:
+            frame = read(file_path)
+    
+    # Keep frames that were preloaded fresh; everything else stays uncached
+    if cache or cached:
+        _frame_cache[key] = (version, frame)
+    return frame
+
+
+def _load_warmup_config() -> dict:
+    """Read [tool.dev-assistant.warmup] from pyproject.toml next to this script"""
+    import tomllib
+    
+    config_path = os.path.join(_PROJECT_DIR, "pyproject.toml")
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'rb') as f:
+        config = tomllib.load(f)
+    return config.get("tool", {}).get("dev-assistant", {}).get("warmup", {})
+
+
+def _record_warmup(section: str, name: str, value):
+    """Publish a warm-up result under the lock so check_environment never sees a dict mid-insert"""
+    with _warmup_lock:
+        if section in ("state", "total"):
+            _warmup_status[section] = value
+        else:
+            _warmup_status[section][name] = value
+
+
+def _run_warmup(config: dict):
+    start = time.perf_counter()
+    _record_warmup("state", None, "running")
+    
+    try:
+        for lib in config.get("imports", []):
+            t = time.perf_counter()
+            try:
+                importlib.import_module(lib)
+                _record_warmup("imports", lib, time.perf_counter() - t)
+            except ImportError:
+                _record_warmup("imports", lib, None)
+        
+        engine = config.get("engine", "polars")
+        separator = config.get("separator", ";")
+        for entry in config.get("preload", []):
+            # A glob, or a table like { path = "padt/MD_*.CSV", has_header = false } whose
+            # options must match the tool call for the cached frame to be reused
+            if isinstance(entry, str):
+                entry = {"path": entry}
+            has_header = entry.get("has_header", True)
+            for file_path in sorted(glob.glob(os.path.join(_PROJECT_DIR, entry["path"]))):
+                t = time.perf_counter()
+                try:
+                    frame = _read_frame(engine, file_path, entry.get("separator", separator), has_header, cache=True)
+                    _record_warmup("preload", file_path, (time.perf_counter() - t, len(frame), None))
+                except Exception as e:
+                    _record_warmup("preload", file_path, (time.perf_counter() - t, 0, str(e)))
+        _record_warmup("state", None, "done")
+    except BaseException as e:  # polars panics are BaseExceptions; never leave the state at "running"
+        _record_warmup("state", None, f"failed: {e}")
+    finally:
+        _record_warmup("total", None, time.perf_counter() - start)
+
+
+def _start_warmup():
+    """Import heavy libraries and pre-parse hot datasets without delaying mcp.run()"""
+    with _warmup_lock:
+        if _warmup_status["state"] != "not started":
+            return  # once per process, even if the lifespan is entered again
+        _warmup_status["state"] = "starting"
+    try:
+        config = _load_warmup_config()
+    except Exception as e:
+        _warmup_status["state"] = f"config error: {e}"
+        return
+    if not config.get("enabled", True) or not (config.get("imports") or config.get("preload")):
+        _warmup_status["state"] = "disabled"
+        return
+    threading.Thread(target=_run_warmup, args=(config,), daemon=True, name="warmup").start()
+
 # =============================================================================
 # CSV ANALYSIS TOOLS (IMMEDIATE RESULTS)
 # =============================================================================
 
 @mcp.tool()
-def polars_csv_analysis(file_path: str, separator: str = ';') -> str:
+def polars_csv_analysis(file_path: str, separator: str = ';', has_header: bool = True) -> str:
     """Fast and comprehensive CSV analysis using Polars (best for European data)"""
     try:
         import polars as pl
@@ -45,8 +435,9 @@ def polars_csv_analysis(file_path: str, separator: str = ';') -> str:
         if not os.path.exists(file_path):
             return f"❌ File not found: {file_path}"
         
-        # Read with polars (handles semicolons well)
-        df = pl.read_csv(file_path, separator=separator)
+        # Read with polars (handles semicolons well), reusing a warm frame when preloaded
+        df = _read_frame("polars", file_path, separator, has_header)
+        compression = _detect_compression(file_path)
         
         file_name = os.path.basename(file_path)
         file_size = os.path.getsize(file_path)
@@ -56,6 +447,8 @@ def polars_csv_analysis(file_path: str, separator: str = ';') -> str:
         result.append("=" * 40)
         result.append(f"📄 File: {file_name}")
         result.append(f"📏 Size: {file_size:,} bytes")
+        if compression:
+            result.append(f"🗜️  Compression: {compression}")
         result.append(f"🔧 Separator: '{separator}'")
         result.append(f"📊 Dimensions: {df.shape[0]} rows × {df.shape[1]} columns")
         result.append("")
@@ -96,7 +489,7 @@ def polars_csv_analysis(file_path: str, separator: str = ';') -> str:
         result.append("")
         result.append("✅ Analysis complete - Polars handles European CSV formats perfectly!")
         
-        return "\n".join(result)
+        return _paginate(result)
         
     except ImportError:
         return """❌ POLARS NOT INSTALLED
@@ -113,7 +506,7 @@ Polars is recommended for:
 
 
 @mcp.tool()
-def pandas_csv_analysis(file_path: str, separator: str = ';') -> str:
+def pandas_csv_analysis(file_path: str, separator: str = ';', has_header: bool = True) -> str:
     """CSV analysis using pandas (fallback if Polars unavailable)"""
     try:
         import pandas as pd
@@ -121,7 +514,8 @@ def pandas_csv_analysis(file_path: str, separator: str = ';') -> str:
         if not os.path.exists(file_path):
             return f"❌ File not found: {file_path}"
         
-        df = pd.read_csv(file_path, sep=separator)
+        df = _read_frame("pandas", file_path, separator, has_header)
+        compression = _detect_compression(file_path)
         file_name = os.path.basename(file_path)
         file_size = os.path.getsize(file_path)
         
@@ -130,6 +524,8 @@ def pandas_csv_analysis(file_path: str, separator: str = ';') -> str:
         result.append("=" * 35)
         result.append(f"📄 File: {file_name}")
         result.append(f"📏 Size: {file_size:,} bytes")
+        if compression:
+            result.append(f"🗜️  Compression: {compression}")
         result.append(f"📊 Shape: {df.shape[0]} rows × {df.shape[1]} columns")
         result.append("")
         
@@ -168,7 +564,7 @@ def pandas_csv_analysis(file_path: str, separator: str = ';') -> str:
         result.append("")
         result.append("✅ Pandas analysis complete")
         
-        return "\n".join(result)
+        return _paginate(result)
         
     except ImportError:
         return "❌ Pandas not installed. Try: pip install pandas"
@@ -183,8 +579,9 @@ def quick_csv_peek(file_path: str) -> str:
         if not os.path.exists(file_path):
             return f"❌ File not found: {file_path}"
         
-        # Minimal file reading
-        with open(file_path, 'r', encoding='utf-8') as f:
+        # Minimal file reading - compressed files are only decompressed as far as these lines
+        compression = _detect_compression(file_path)
+        with _open_text(file_path) as f:
             lines = [f.readline().strip() for _ in range(5)]
         
         size = os.path.getsize(file_path)
@@ -194,6 +591,8 @@ def quick_csv_peek(file_path: str) -> str:
         result.append("📄 QUICK CSV PEEK")
         result.append("=" * 25)
         result.append(f"File: {os.path.basename(file_path)} ({size:,} bytes)")
+        if compression:
+            result.append(f"Compression: {compression}")
         result.append(f"Separator: '{sep}'")
         result.append("")
         
@@ -205,11 +604,409 @@ def quick_csv_peek(file_path: str) -> str:
         result.append("")
         result.append("✅ Ultra-fast preview complete")
         
-        return "\n".join(result)
+        return _paginate(result)
         
     except Exception as e:
         return f"❌ Error: {str(e)}"
 
+# =============================================================================
+# DATA COMPARISON & VALIDATION TOOLS
+# =============================================================================
+
+def _open_csv(file_path: str, separator: str = ';', has_header: bool = True):
+    """Open a CSV for streaming, returning (handle, header, row iterator, reader)
+
+    The reader is returned for its line_num, which counts physical lines, so
+    positions stay right when quoted fields contain newlines.
+    """
+    f = _open_text(file_path, prefetch=True)
+    reader = csv.reader(f, delimiter=separator)
+    first = next(reader, [])
+    if has_header:
+        return f, [col.strip() for col in first], reader, reader
+    
+    # Headerless extracts (like padt/MD_*.CSV) get Polars-style column names
+    header = [f"column_{i}" for i in range(1, len(first) + 1)]
+    return f, header, itertools.chain([first], reader), reader
+
+
+def _column_getter(header: list[str], columns: list[str]):
+    """Build a fast row -> tuple accessor for the named columns"""
+    missing = [col for col in columns if col not in header]
+    if missing:
+        raise ValueError(f"Unknown column(s) {missing} - available: {', '.join(header)}")
+    
+    indices = [header.index(col) for col in columns]
+    if len(indices) == 1:
+        i = indices[0]
+        return lambda row: (row[i],)
+    return operator.itemgetter(*indices)
+
+
+_DIFF_COLUMN_SAMPLE = 10_000  # changed rows re-read to name the changed columns
+
+
+def _pad_row(row: list[str], width: int) -> list[str]:
+    """Pad ragged rows so column accessors never go out of range"""
+    return row + [''] * (width - len(row))
+
+
+def _scan_csv_strings(file_path: str, separator: str, has_header: bool):
+    """Lazy all-string Polars scan, so values compare exactly as written in the file"""
+    import polars as pl
+    
+    options = dict(separator=separator, has_header=has_header, infer_schema=False,
+                   missing_utf8_is_empty_string=True, truncate_ragged_lines=True)
+    if _detect_compression(file_path):
+        # scan_csv can't stream compressed input; decompress into memory instead
+        with _open_stream(file_path) as stream:
+            return pl.read_csv(io.BytesIO(stream.read()), **options).lazy()
+    return pl.scan_csv(file_path, **options)
+
+
+@mcp.tool()
+def diff_csv(old_file: str, new_file: str, key_columns: list[str], separator: str = ';',
+             has_header: bool = True, sample_size: int = 5) -> str:
+    """Fast streaming diff of two CSV snapshots by key (added, removed and changed rows)"""
+    try:
+        import polars as pl
+        
+        if not key_columns:
+            return "❌ Diff error: key_columns must name at least one column"
+        for path in (old_file, new_file):
+            if not os.path.exists(path):
+                return f"❌ File not found: {path}"
+        
+        start = time.perf_counter()
+        old_scan = _scan_csv_strings(old_file, separator, has_header)
+        new_scan = _scan_csv_strings(new_file, separator, has_header)
+        old_header = old_scan.collect_schema().names()
+        new_header = new_scan.collect_schema().names()
+        for header, path in ((old_header, old_file), (new_header, new_file)):
+            missing = [col for col in key_columns if col not in header]
+            if missing:
+                return (f"❌ Diff error: unknown key column(s) {missing} in {os.path.basename(path)} "
+                        f"- available: {', '.join(header)}")
+        
+        # Compare on the shared columns so added/dropped columns don't flag every row
+        columns = [col for col in old_header if col in new_header]
+        row_hash = pl.struct(columns).hash().alias("_hash")
+        
+        # One streaming query per file pair: each side is reduced to key + row hash,
+        # repeated keys keep the old file's last and the new file's first occurrence,
+        # and only keys that differ are collected. The row counts share the same scans.
+        old_hashes = old_scan.select(*key_columns, row_hash).unique(subset=key_columns, keep="last")
+        new_hashes = new_scan.select(*key_columns, row_hash).unique(subset=key_columns, keep="first")
+        joined = old_hashes.join(new_hashes, on=key_columns, how="full", coalesce=True, suffix="_new")
+        status = (pl.when(pl.col("_hash").is_null()).then(pl.lit("added"))
+                  .when(pl.col("_hash_new").is_null()).then(pl.lit("removed"))
+                  .when(pl.col("_hash") != pl.col("_hash_new")).then(pl.lit("changed")))
+        differences, union, old_total, new_total = pl.collect_all([
+            joined.select(*key_columns, status.alias("_status")).drop_nulls("_status"),
+            joined.select(pl.len()),
+            old_scan.select(pl.len()),
+            new_scan.select(pl.len()),
+        ], engine="streaming")
+        
+        added = differences.filter(pl.col("_status") == "added")
+        removed = differences.filter(pl.col("_status") == "removed")
+        changed = differences.filter(pl.col("_status") == "changed")
+        added_count, removed_count, changed_count = added.height, removed.height, changed.height
+        old_count, new_count = old_total.item(), new_total.item()
+        duplicate_keys = old_count - (union.item() - added_count)
+        new_duplicates = new_count - (union.item() - removed_count)
+        
+        # One more streaming pass per file, but only when there is something to show,
+        # and only over the sampled keys (a semi-join), never the whole snapshot
+        added_keys = added.select(key_columns).head(sample_size)
+        removed_keys = removed.select(key_columns).head(sample_size)
+        changed_keys = changed.select(key_columns).head(_DIFF_COLUMN_SAMPLE)
+        
+        def sample_rows(scan, keys, keep):
+            if keys.is_empty():
+                return pl.DataFrame(schema=dict.fromkeys(columns, pl.String))
+            rows = scan.select(columns).join(keys.lazy(), on=key_columns, how="semi")
+            return rows.collect(engine="streaming").unique(subset=key_columns, keep=keep)
+        
+        old_rows = sample_rows(old_scan, pl.concat([removed_keys, changed_keys]), "last")
+        new_rows = sample_rows(new_scan, pl.concat([added_keys, changed_keys]), "first")
+        added_samples = new_rows.join(added_keys, on=key_columns, how="semi").rows()
+        removed_samples = old_rows.join(removed_keys, on=key_columns, how="semi").rows()
+        
+        # Column-level detail comes from a bounded sample of changed keys
+        column_changes = dict.fromkeys(columns, 0)
+        column_sample = min(changed_count, _DIFF_COLUMN_SAMPLE)
+        changed_samples = []
+        if changed_count:
+            pairs = old_rows.join(new_rows, on=key_columns, suffix="_new").join(changed_keys, on=key_columns, how="semi")
+            compared = [col for col in columns if col not in key_columns]
+            flags = pairs.select([(pl.col(col) != pl.col(f"{col}_new")).alias(col) for col in compared])
+            for col, count in zip(compared, flags.sum().row(0)):
+                column_changes[col] = count
+            for row in pairs.head(sample_size).iter_rows(named=True):
+                key = " | ".join(row[col] for col in key_columns)
+                diffs = {col: (row[col], row[f"{col}_new"]) for col in compared if row[col] != row[f"{col}_new"]}
+                changed_samples.append((key, diffs))
+        
+        elapsed = time.perf_counter() - start
+        
+        result = []
+        result.append("🔀 CSV SNAPSHOT DIFF")
+        result.append("=" * 40)
+        result.append(f"📄 Old: {os.path.basename(old_file)} ({old_count:,} rows)")
+        result.append(f"📄 New: {os.path.basename(new_file)} ({new_count:,} rows)")
+        result.append(f"🔑 Key: {', '.join(key_columns)}")
+        result.append(f"⏱️  Time: {elapsed:.2f}s")
+        result.append("")
+        
+        dropped_cols = [col for col in old_header if col not in new_header]
+        new_cols = [col for col in new_header if col not in old_header]
+        if dropped_cols or new_cols:
+            result.append("🏗️  SCHEMA CHANGES:")
+            if dropped_cols:
+                result.append(f"  Removed columns: {', '.join(dropped_cols)}")
+            if new_cols:
+                result.append(f"  Added columns: {', '.join(new_cols)}")
+            result.append("")
+        
+        result.append("📊 SUMMARY:")
+        result.append(f"  ➕ Added:   {added_count:,}")
+        result.append(f"  ➖ Removed: {removed_count:,}")
+        result.append(f"  ✏️  Changed: {changed_count:,}")
+        result.append(f"  ⚪ Unchanged: {new_count - new_duplicates - added_count - changed_count:,}")
+        if duplicate_keys:
+            result.append(f"  ⚠️  {duplicate_keys:,} duplicate keys in old file (last occurrence used)")
+        if new_duplicates:
+            result.append(f"  ⚠️  {new_duplicates:,} duplicate keys in new file (first occurrence used)")
+        result.append("")
+        
+        if changed_count:
+            if column_sample < changed_count:
+                result.append(f"🧬 CHANGED COLUMNS (sample of {column_sample:,} changed rows):")
+            else:
+                result.append("🧬 CHANGED COLUMNS:")
+            for col, count in sorted(column_changes.items(), key=lambda item: -item[1]):
+                if count:
+                    result.append(f"  {col:<20} | {count:>8,} rows")
+            result.append("")
+        
+        if added_samples:
+            result.append(f"➕ ADDED (sample of {len(added_samples)}):")
+            for values in added_samples:
+                result.append(f"  {list(values)}")
+            result.append("")
+        
+        if removed_samples:
+            result.append(f"➖ REMOVED (sample of {len(removed_samples)}):")
+            for values in removed_samples:
+                result.append(f"  {list(values)}")
+            result.append("")
+        
+        if changed_samples:
+            result.append(f"✏️  CHANGED (sample of {len(changed_samples)}):")
+            for key, diffs in changed_samples:
+                result.append(f"  {key}:")
+                for col, (old_val, new_val) in diffs.items():
+                    result.append(f"    {col}: {old_val!r} → {new_val!r}")
+            result.append("")
+        
+        result.append("✅ Diff complete")
+        
+        return _paginate(result)
+        
+    except ImportError:
+        return "❌ Polars not installed - diff_csv needs it. Try: pip install polars"
+    except Exception as e:
+        return f"❌ Diff error: {str(e)}"
+
+def _display_path(path: str) -> str:
+    """Show resolved paths relative to the working directory where possible"""
+    try:
+        return os.path.relpath(path)
+    except ValueError:  # different drive on Windows
+        return path
+
+
+@mcp.tool()
+def validate_relationships(keys: dict[str, list[str]], foreign_keys: list[dict] | None = None,
+                           file_options: dict[str, dict] | None = None, separator: str = ';',
+                           sample_size: int = 5) -> str:
+    """Check key uniqueness and foreign-key integrity across CSV files (one streaming pass per file)
+
+    keys:         {"padt/MD_PLANT.CSV": ["column_1"], ...} - columns that must be unique
+    foreign_keys: [{"file": "padt/sales.csv", "columns": ["plant"],
+                    "references": "padt/MD_PLANT.CSV", "ref_columns": ["column_1"]}, ...]
+                  ref_columns defaults to the declared key of the referenced file.
+                  A foreign key with any blank column counts as not set (like SQL's
+                  MATCH SIMPLE): it is reported as blank and not checked for orphans.
+    file_options: per-file read options, e.g. {"padt/MD_PLANT.CSV": {"has_header": False},
+                  "padt/sales.csv": {"separator": ","}}. Headerless files get columns
+                  named column_1, column_2, ...; `separator` is the default for the rest.
+    """
+    try:
+        keys = {os.path.realpath(path): cols for path, cols in keys.items()}
+        options = {os.path.realpath(path): opts for path, opts in (file_options or {}).items()}
+        
+        fks = []
+        for rule in foreign_keys or []:
+            missing = [field for field in ("file", "columns", "references") if field not in rule]
+            if missing:
+                return f"❌ Foreign key rule {rule} is missing: {', '.join(missing)}"
+            ref = os.path.realpath(rule["references"])
+            ref_columns = rule.get("ref_columns") or keys.get(ref)
+            if not ref_columns:
+                return f"❌ No ref_columns given and no key declared for {rule['references']}"
+            if len(ref_columns) != len(rule["columns"]):
+                return f"❌ Column count mismatch in rule {rule}"
+            fks.append({
+                "file": os.path.realpath(rule["file"]),
+                "columns": rule["columns"],
+                "references": ref,
+                "ref_columns": ref_columns,
+                "orphans": {},       # value -> [row count, first line]
+                "checked": 0,
+                "blank": 0,
+            })
+        
+        files = list(dict.fromkeys([*keys, *(fk["references"] for fk in fks), *(fk["file"] for fk in fks)]))
+        for path in files:
+            if not os.path.exists(path):
+                return f"❌ File not found: {_display_path(path)}"
+        
+        # Read referenced files first so foreign keys can be anti-joined inline;
+        # only cyclic references fall back to collecting distinct values for a final check
+        order = []
+        pending = files[:]
+        while pending:
+            ready = [path for path in pending
+                     if all(fk["references"] in order or fk["references"] == path
+                            for fk in fks if fk["file"] == path)] or pending[:1]
+            for path in ready:
+                order.append(path)
+                pending.remove(path)
+        
+        key_sets = {}      # (file, columns) -> set of key tuples
+        key_checks = {}    # file -> {"rows", "duplicates", "samples"}
+        row_counts = {}
+        start = time.perf_counter()
+        
+        for path in order:
+            has_header = options.get(path, {}).get("has_header", True)
+            f, header, rows, reader = _open_csv(path, options.get(path, {}).get("separator", separator), has_header)
+            with f:
+                # Key sets other rules need from this file (shared with the uniqueness check)
+                wanted = {tuple(cols) for p, cols in keys.items() if p == path}
+                wanted |= {tuple(fk["ref_columns"]) for fk in fks if fk["references"] == path}
+                collectors = [(cols, _column_getter(header, list(cols)), key_sets.setdefault((path, cols), set()))
+                              for cols in wanted]
+                
+                key_cols = tuple(keys.get(path, ()))
+                key_check = None
+                if key_cols:
+                    key_check = key_checks[path] = {"duplicates": 0, "samples": []}
+                
+                checks = []
+                for fk in fks:
+                    if fk["file"] != path:
+                        continue
+                    target = key_sets.get((fk["references"], tuple(fk["ref_columns"])))
+                    inline = fk["references"] != path and target is not None
+                    fk["inline"] = inline
+                    checks.append((fk, _column_getter(header, fk["columns"]), target if inline else None))
+                
+                width = len(header)
+                last_line = reader.line_num if has_header else 0
+                count = 0
+                for row in rows:
+                    # Physical line where this record starts (records may span lines)
+                    line, last_line = last_line + 1, reader.line_num
+                    if len(row) < width:
+                        if not row:
+                            continue
+                        row = _pad_row(row, width)
+                    count += 1
+                    
+                    for cols, getter, seen in collectors:
+                        value = getter(row)
+                        if cols == key_cols and value in seen:
+                            key_check["duplicates"] += 1
+                            if len(key_check["samples"]) < sample_size:
+                                key_check["samples"].append((value, line))
+                        seen.add(value)
+                    
+                    for fk, getter, target in checks:
+                        value = getter(row)
+                        if not all(value):
+                            fk["blank"] += 1
+                            continue
+                        fk["checked"] += 1
+                        if target is None or value not in target:
+                            entry = fk["orphans"].get(value)
+                            if entry is None:
+                                fk["orphans"][value] = [1, line]
+                            else:
+                                entry[0] += 1
+                
+                row_counts[path] = count
+        
+        # Deferred (cyclic / self-referencing) rules: anti-join the distinct values now
+        for fk in fks:
+            if not fk["inline"]:
+                target = key_sets[(fk["references"], tuple(fk["ref_columns"]))]
+                fk["orphans"] = {value: entry for value, entry in fk["orphans"].items() if value not in target}
+        
+        elapsed = time.perf_counter() - start
+        
+        result = []
+        result.append("🔗 REFERENTIAL INTEGRITY CHECK")
+        result.append("=" * 40)
+        result.append(f"📄 Files: {len(order)} (one pass each)")
+        result.append(f"⏱️  Time: {elapsed:.2f}s")
+        result.append("")
+        
+        problems = 0
+        
+        if key_checks:
+            result.append("🔑 KEY UNIQUENESS:")
+            for path, check in key_checks.items():
+                label = f"{_display_path(path)} [{', '.join(keys[path])}]"
+                if check["duplicates"]:
+                    problems += 1
+                    result.append(f"  ❌ {label}: {check['duplicates']:,} duplicate keys in {row_counts[path]:,} rows")
+                    for value, line in check["samples"]:
+                        result.append(f"      {' | '.join(value)} (line {line})")
+                else:
+                    result.append(f"  ✅ {label}: {row_counts[path]:,} rows, all unique")
+            result.append("")
+        
+        if fks:
+            result.append("🧷 FOREIGN KEYS:")
+            for fk in fks:
+                label = (f"{_display_path(fk['file'])} [{', '.join(fk['columns'])}] → "
+                         f"{_display_path(fk['references'])} [{', '.join(fk['ref_columns'])}]")
+                orphan_rows = sum(entry[0] for entry in fk["orphans"].values())
+                blank = f", {fk['blank']:,} blank" if fk["blank"] else ""
+                if orphan_rows:
+                    problems += 1
+                    result.append(f"  ❌ {label}: {orphan_rows:,}/{fk['checked']:,} orphan rows "
+                                  f"({len(fk['orphans']):,} distinct values{blank})")
+                    top = sorted(fk["orphans"].items(), key=lambda item: -item[1][0])[:sample_size]
+                    for value, (hits, line) in top:
+                        result.append(f"      {' | '.join(value)}: {hits:,} rows (first at line {line})")
+                else:
+                    result.append(f"  ✅ {label}: {fk['checked']:,} rows, no orphans{blank}")
+            result.append("")
+        
+        if problems:
+            result.append(f"⚠️  {problems} rule(s) violated")
+        else:
+            result.append("✅ All relationships valid")
+        
+        return _paginate(result)
+        
+    except Exception as e:
+        return f"❌ Validation error: {str(e)}"
+
 # =============================================================================
 # R SCRIPT GENERATION TOOLS
 # =============================================================================
@@ -577,21 +1374,23 @@ Available types: exploratory, statistical, visualization
 @mcp.tool()
 def list_project_files(path: str = ".") -> str:
     """List files in project directory with smart categorization"""
-    try:
-        files = []
+    def walk():
+        yield f"📁 Project files in {path}:"
         for root, dirs, filenames in os.walk(path):
             dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__']]
             
             for filename in filenames:
                 rel_path = os.path.relpath(os.path.join(root, filename), path)
                 if filename.endswith(('.R', '.py', '.qmd', '.Rmd', '.ipynb')):
-                    files.append(f"📄 {rel_path}")
+                    yield f"📄 {rel_path}"
                 elif filename.endswith(('.csv', '.json', '.xlsx', '.txt')):
-                    files.append(f"📊 {rel_path}")
+                    yield f"📊 {rel_path}"
                 else:
-                    files.append(f"   {rel_path}")
-        
-        return f"📁 Project files in {path}:\n" + "\n".join(files[:50])
+                    yield f"   {rel_path}"
+    
+    try:
+        # Walked lazily: later pages are only listed when fetch_more asks for them
+        return _paginate(walk())
         
     except Exception as e:
         return f"❌ Error listing files: {str(e)}"
@@ -714,6 +1513,27 @@ def check_environment() -> str:
     import sys
     result.append(f"🐍 Python: {sys.version.split()[0]}")
     
+    # Startup warm-up - snapshot under the lock, the warm-up thread may still be inserting
+    with _warmup_lock:
+        state, total = _warmup_status["state"], _warmup_status["total"]
+        imports = list(_warmup_status["imports"].items())
+        preload = list(_warmup_status["preload"].items())
+    result.append("")
+    result.append(f"🔥 Warm-up: {state}")
+    for lib, seconds in imports:
+        if seconds is None:
+            result.append(f"  ❌ import {lib}: Not installed")
+        else:
+            result.append(f"  ✅ import {lib}: {seconds:.2f}s")
+    for file_path, (seconds, rows, error) in preload:
+        name = os.path.relpath(file_path, _PROJECT_DIR)
+        if error:
+            result.append(f"  ❌ preload {name}: {error}")
+        else:
+            result.append(f"  ✅ preload {name}: {rows:,} rows in {seconds:.2f}s")
+    if total is not None:
+        result.append(f"  Total: {total:.2f}s")
+    
     return "\n".join(result)
 
 